@@ -51,18 +51,19 @@ class ZusiClient:
         """Generator to get decoded messages from a stream"""
 
         decoder = AsyncStreamDecoder()
-        decoded_tree = decoder.decode(stream_bytes)
-        nodes = []
-        async for node in decoded_tree:
-            messagedecoder = MessageDecoder()
-            yield messagedecoder.parse(node)      
+        messagedecoder = MessageDecoder()
+        decoded_tree = decoder.decode_tree(stream_bytes)
+        async for tree in decoded_tree:
+            messagedecoder.reset()
+            yield messagedecoder.parse_tree(tree)
 
     async def _zusi_writer(self, write_stream):
         """Queue worker to send messages to Zusi on the stream"""
 
         while True:
             msg = await self.send_messagequeue.get()
-            writer_log.debug("Sending msg to Zusi: %s %s" % (msg.__class__.__name__, str(suppress_none_values(msg._asdict()))))
+            if writer_log.isEnabledFor(logging.DEBUG):
+                writer_log.debug("Sending msg to Zusi: %s %s", msg.__class__.__name__, suppress_none_values(msg._asdict()))
             write_stream.write(encode_obj(msg).encode())
 
     async def _zusi_reader(self, reader):
@@ -73,17 +74,19 @@ class ZusiClient:
         while True:
             basemessage, submessages = await msg_reader.__anext__()
             if basemessage is not None:
-                reader_log.debug("Got basemessage from Zusi: %s %s" % (basemessage.__class__.__name__, str(suppress_none_values(basemessage._asdict()))))
+                if reader_log.isEnabledFor(logging.DEBUG):
+                    reader_log.debug("Got basemessage from Zusi: %s %s", basemessage.__class__.__name__, suppress_none_values(basemessage._asdict()))
                 self.receive_messagequeue.put_nowait(basemessage)
             for message in submessages:
-                reader_log.debug("Got submessage from Zusi: %s %s" % (message.__class__.__name__, str(suppress_none_values(message._asdict()))))
+                if reader_log.isEnabledFor(logging.DEBUG):
+                    reader_log.debug("Got submessage from Zusi: %s %s", message.__class__.__name__, suppress_none_values(message._asdict()))
                 self.receive_messagequeue.put_nowait(message)
 
     async def _update_local_state(self):
         updater_log.info("Awaiting new states")
         while True:
             msg = await self.receive_messagequeue.get()
-            updater_log.debug("Got new data for %s" % str(type(msg)))
+            updater_log.debug("Got new data for %s", type(msg))
             if msg is None:
                 continue
 
@@ -112,7 +115,7 @@ class ZusiClient:
                 updater_log.debug("Just same content, skipping")
                 continue
 
-            updater_log.debug("Updated keys: %s" % updated_keys)
+            updater_log.debug("Updated keys: %s", updated_keys)
             self.local_state[msgtype] = known_msg_state._replace(**updated_keys)
             self.message_update_events[msgtype].set()
             self.local_state_changed.set()
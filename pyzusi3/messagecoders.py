@@ -6,7 +6,7 @@ import struct
 from pyzusi3.exceptions import MissingLowLevelParameterError
 
 from pyzusi3.messages import ParameterId, message_index, lowlevel_parameters, ContentType
-from pyzusi3.nodes import BasicNode
+from pyzusi3.nodes import BasicNode, NodeTree
 
 def print_nodetree(node, level=0):
     print("%s%s:%s" % (" " * level, node.id, node.content))
@@ -61,15 +61,26 @@ class MessageDecoder:
         self.lowlevel_parameter = None
     
     def parse(self, root_node, start_level=1):
+        if isinstance(root_node, NodeTree):
+            tree = root_node
+        else:
+            tree = NodeTree.from_node(root_node)
+
+        return self.parse_tree(tree, 0, start_level)
+
+    def parse_tree(self, tree, index=0, start_level=1):
         if not self.message_class:
-            self.init_msg_params(root_node)
+            self._init_tree_params(tree, index)
 
-        self.map_parameters(root_node, self.message_pid, start_level)
+        self._map_tree_parameters(tree, index, self.message_pid, start_level)
 
         return self.finalize()
 
     def init_msg_params(self, root_node):
-        self.message_class, self.message_pid = self.find_messageclass(root_node)
+        self._init_tree_params(NodeTree.from_node(root_node), 0)
+
+    def _init_tree_params(self, tree, index):
+        self.message_class, self.message_pid = self._find_tree_messageclass(tree, index)
         self.lowlevel_parameter = lowlevel_parameters[self.message_class]
 
     def finalize(self):
@@ -77,20 +88,23 @@ class MessageDecoder:
         return basemessage, self.submessages
 
     def find_messageclass(self, root_node):
+        return self._find_tree_messageclass(NodeTree.from_node(root_node), 0)
+
+    def _find_tree_messageclass(self, tree, index):
         current_pid = ParameterId()
-        current_node = root_node
+        current_index = index
         current_level = 1
 
         while current_level < 7:
-            params = {'id' + str(current_level): current_node.id}
+            params = {'id' + str(current_level): tree.ids[current_index]}
             current_pid = current_pid._replace(**params)
             if current_pid in message_index:
                 break
             current_level += 1
-            if len(current_node.children) == 0:
+            if tree.first_child[current_index] < 0:
                 # bug detector, should never happen
                 break
-            current_node = current_node.children[0]
+            current_index = tree.first_child[current_index]
 
         if current_pid not in message_index:
             raise NotImplementedError("Message for index %s not yet implemented" % str(current_pid))
@@ -98,7 +112,11 @@ class MessageDecoder:
         return message_index[current_pid], current_pid
 
     def map_parameters(self, current_node, current_pid, current_level):
-        if current_pid == ParameterId(2, 10, 169) and current_node.content:
+        self._map_tree_parameters(NodeTree.from_node(current_node), 0, current_pid, current_level)
+
+    def _map_tree_parameters(self, tree, index, current_pid, current_level):
+        content = tree.contents[index]
+        if current_pid == ParameterId(2, 10, 169) and content:
             # whitelist bug in FTD message
             # https://forum.zusi.de/viewtopic.php?f=55&t=18246
             return
@@ -107,7 +125,7 @@ class MessageDecoder:
         if len(mapping_parameter) > 1:
             raise NotImplementedError("Parameter %s is not unique for %s, programming error!" % (current_pid, self.message_class))
         if not len(mapping_parameter):
-            self.log.debug("Parameter %s is not known for %s, checking for submessage" % (current_pid, self.message_class))
+            self.log.debug("Parameter %s is not known for %s, checking for submessage", current_pid, self.message_class)
             check_param_index = None
             submessage_class = None
             for i in range(len(current_pid), 1, -1):
@@ -117,7 +135,7 @@ class MessageDecoder:
                     if submessage_class == self.message_class:
                         submessage_class = None
                         break
-                    self.log.debug("Found submessage of type %s" % submessage_class)
+                    self.log.debug("Found submessage of type %s", submessage_class)
                     break
             if submessage_class is None:
                 self.log.warning("Parameter %s is not known for %s and no submessage, discarding" % (current_pid, self.message_class))
@@ -128,7 +146,7 @@ class MessageDecoder:
             submsg_decoder.message_class = submessage_class
             submsg_decoder.message_pid = check_param_index
             submsg_decoder.lowlevel_parameter = lowlevel_parameters[submessage_class]
-            basemsg, submsgs = submsg_decoder.parse(current_node, current_level)
+            basemsg, submsgs = submsg_decoder.parse_tree(tree, index, current_level)
             self.submessages.append(basemsg)
             if submsgs:
                 self.submessages.extend(submsgs)
@@ -143,9 +161,9 @@ class MessageDecoder:
             multi_msg_decoder.message_pid = current_pid
             multi_msg_decoder.lowlevel_parameter = lowlevel_parameters[multi_msg_class]
 
-            for child_node in current_node.children:
-                sub_pid = {'id' + str(current_level + 1): child_node.id}          
-                multi_msg_decoder.map_parameters(child_node, current_pid._replace(**sub_pid), current_level + 1)
+            for child_index in tree.children_of(index):
+                sub_pid = {'id' + str(current_level + 1): tree.ids[child_index]}
+                multi_msg_decoder._map_tree_parameters(tree, child_index, current_pid._replace(**sub_pid), current_level + 1)
             basemsg, submsgs = multi_msg_decoder.finalize()
 
             paramname = mapping_parameter.parametername
@@ -154,23 +172,23 @@ class MessageDecoder:
             self.mapped_parameters[paramname].append(basemsg)
 
             return
-        if current_node.content:
+        if content:
             # Decode binary content
-            decoded_content = decode_data(current_node.content, mapping_parameter.contenttype, mapping_parameter.enumtype)
+            decoded_content = decode_data(content, mapping_parameter.contenttype, mapping_parameter.enumtype)
             if mapping_parameter.multipletimes == True:
                 if mapping_parameter.parametername not in self.mapped_parameters:
                     self.mapped_parameters[mapping_parameter.parametername] = []
                 self.mapped_parameters[mapping_parameter.parametername].append(decoded_content)
             else:
                 self.mapped_parameters[mapping_parameter.parametername] = decoded_content
-        elif current_node.nodeasbool:
+        elif tree.nodeasbool(index):
             # Tree just has an empty node but acts as True value
             if mapping_parameter.nodeasbool == True:
                 self.mapped_parameters[mapping_parameter.parametername] = True
-        for child_node in current_node.children:
-            params = {'id' + str(current_level + 1): child_node.id}
+        for child_index in tree.children_of(index):
+            params = {'id' + str(current_level + 1): tree.ids[child_index]}
             child_pid = current_pid._replace(**params)
-            self.map_parameters(child_node, child_pid, current_level + 1)
+            self._map_tree_parameters(tree, child_index, child_pid, current_level + 1)
 
 
 def level_for_parameterid(parameterid):
@@ -1,3 +1,4 @@
+from array import array
 from enum import Enum
 import struct
 import logging
@@ -5,6 +6,12 @@ import asyncio
 
 from pyzusi3.exceptions import DecodeValueError, EncodingValueError, MissingBytesDecodeError, MissingContentTypeError
 
+_U16_FROM = struct.Struct("<H").unpack_from
+_U32_FROM = struct.Struct("<I").unpack_from
+
+_NODE_START = b'\x00\x00\x00\x00'
+_NODE_END = b'\xff\xff\xff\xff'
+
 class ContentType(Enum):
     BYTE = 0
     SHORTINT = 1
@@ -20,7 +27,51 @@ class ContentType(Enum):
     RAW = 11 # same as file but used to indicate non-decoded content
 
 
+_PACK_B = struct.Struct("<B").pack
+_PACK_b = struct.Struct("<b").pack
+_PACK_H = struct.Struct("<H").pack
+_PACK_h = struct.Struct("<h").pack
+_PACK_I = struct.Struct("<I").pack
+_PACK_i = struct.Struct("<i").pack
+_PACK_q = struct.Struct("<q").pack
+_PACK_f = struct.Struct("<f").pack
+_PACK_d = struct.Struct("<d").pack
+
+
+def _encode_string(content):
+    try:
+        return content.encode("latin1")
+    except UnicodeEncodeError as ue:
+        raise EncodingValueError("Content %s cannot be encoded as latin1: %s" % (content, str(ue))) from ue
+    except AttributeError as ae:
+        raise EncodingValueError("Content %s is not a string" % str(content)) from ae
+
+
+def _encode_bytes(content):
+    if not isinstance(content, bytes):
+        raise EncodingValueError("Content is not in bytes format")
+    return content
+
+
+_ENCODERS = {
+    ContentType.BYTE: _PACK_B,
+    ContentType.SHORTINT: _PACK_b,
+    ContentType.WORD: _PACK_H,
+    ContentType.SMALLINT: _PACK_h,
+    ContentType.INTEGER: _PACK_i,
+    ContentType.CARDINAL: _PACK_I,
+    ContentType.INTEGER64BIT: _PACK_q,
+    ContentType.SINGLE: _PACK_f,
+    ContentType.DOUBLE: _PACK_d,
+    ContentType.STRING: _encode_string,
+    ContentType.FILE: _encode_bytes,
+    ContentType.RAW: _encode_bytes,
+}
+
+
 class BasicNode:
+    __slots__ = ('_id', '_id_bytes', 'content', '_contenttype', '_encode_impl', 'children', 'parent_node', 'nodeasbool')
+
     def __init__(self, id=None, content=None, contenttype=None, children=None, parent_node=None, nodeasbool=False) -> None:
         self.id = id
         self.content = content
@@ -32,296 +83,435 @@ class BasicNode:
         self.parent_node = parent_node
         self.nodeasbool = nodeasbool
 
+    @property
+    def id(self):
+        return self._id
+
+    @id.setter
+    def id(self, value):
+        self._id = value
+        self._id_bytes = None # encoded on first use, see encode()
+
+    @property
+    def contenttype(self):
+        return self._contenttype
+
+    @contenttype.setter
+    def contenttype(self, value):
+        self._contenttype = value
+        self._encode_impl = _ENCODERS.get(value)
+
     def __lt__(self, other):
         return self.id < other.id
 
-    def __eq__(self, other):
-        return other is not None and self.id == other.id and self.content == other.content and self.contenttype == other.contenttype and self.children == other.children and self.nodeasbool == other.nodeasbool
+    def deep_equal(self, other):
+        """Compare this node and all of its subnodes to other"""
+
+        if not isinstance(other, BasicNode):
+            return False
+        if self.id != other.id or self.content != other.content or self.contenttype != other.contenttype:
+            return False
+        if self.nodeasbool != other.nodeasbool or len(self.children) != len(other.children):
+            return False
+        for child, other_child in zip(self.children, other.children):
+            if not child.deep_equal(other_child):
+                return False
+        return True
 
     def __repr__(self):
         return "<%s id=%s content=%s contenttype=%s parent_node=%s children_len=%s, nodeasbool=%s>" % (self.__class__.__name__, self.id, self.content, self.contenttype, self.parent_node, len(self.children), self.nodeasbool)
 
     def _encodecontent(self):
-        result = b''
-        if self.contenttype is None:
-            raise MissingContentTypeError("No contenttype has been given to encode to")
-        if self.contenttype == ContentType.BYTE:
-            try:
-                if not 0 <= self.content <= 255:
-                    raise EncodingValueError("Content %s exceeds limits of 0-255 for a byte" % str(self.content))
-            except TypeError:
-                raise EncodingValueError("Content %s cannot be compared for range 0-255" % str(self.content))
-            result += self.content.to_bytes(1, byteorder='little')
-        elif self.contenttype == ContentType.SHORTINT:
-            try:
-                if not -128 <= self.content <= 127:
-                    raise EncodingValueError("Content %s exceeds limits of -128 to 127 for a short int" % str(self.content))
-            except TypeError:
-                raise EncodingValueError("Content %s cannot be compared for range -128 to 127" % str(self.content))
-            result += self.content.to_bytes(1, byteorder='little')
-        elif self.contenttype == ContentType.WORD:
-            try:
-                if not 0 <= self.content <= 65535:
-                    raise EncodingValueError("Content %s exceeds limits of 0-65535 for a word" % str(self.content))
-            except TypeError:
-                raise EncodingValueError("Content %s cannot be compared for range 0-65535" % str(self.content))
-            result += self.content.to_bytes(2, byteorder='little')
-        elif self.contenttype == ContentType.SMALLINT:
-            try:
-                if not -32768 <= self.content <= 32767:
-                    raise EncodingValueError("Content %s exceeds limits of -32768 to 32767 for a small int" % str(self.content))
-            except TypeError:
-                raise EncodingValueError("Content %s cannot be compared for range -32768 to 32767" % str(self.content))
-            result += self.content.to_bytes(2, byteorder='little')
-        elif self.contenttype == ContentType.INTEGER:
-            try:
-                if not -2147483648 <= self.content <= 2147483647:
-                    raise EncodingValueError("Content %s exceeds limits of -2147483648 to 2147483647 for an int" % str(self.content))
-            except TypeError:
-                raise EncodingValueError("Content %s cannot be compared for range -2147483648 to 2147483647" % str(self.content))
-            result += self.content.to_bytes(4, byteorder='little')
-        elif self.contenttype == ContentType.CARDINAL:
-            try:
-                if not 0 <= self.content <= 4294967295:
-                    raise EncodingValueError("Content %s exceeds limits of 0 to 4294967295 for a cardinal" % str(self.content))
-            except TypeError:
-                raise EncodingValueError("Content %s cannot be compared for range 0 to 4294967295" % str(self.content))
-            result += self.content.to_bytes(4, byteorder='little')
-        elif self.contenttype == ContentType.INTEGER64BIT:
-            try:
-                if not -9223372036854775808 <= self.content <= 9223372036854775807:
-                    raise EncodingValueError("Content %s exceeds limits of -9223372036854775808 to 9223372036854775807 for an int64" % str(self.content))
-            except TypeError:
-                raise EncodingValueError("Content %s cannot be compared for range -9223372036854775808 to 9223372036854775807" % str(self.content))
-            result += self.content.to_bytes(8, byteorder='little')
-        elif self.contenttype == ContentType.SINGLE:
-            try:
-                if not -3.4E38 <= self.content <= 3.4E38:
-                    raise EncodingValueError("Content %s exceeds limits of -3.4E38 to 3.4E38 for a single" % str(self.content))
-            except TypeError:
-                raise EncodingValueError("Content %s cannot be compared for range -3.4E38 to 3.4E38" % str(self.content))
-            try:
-                result += struct.pack("<f", self.content)
-            except OverflowError as e:
-                raise EncodingValueError("Content %s cannot be encoded: %s" % str(e))
-        elif self.contenttype == ContentType.DOUBLE:
-            try:
-                if not -1.7E308 <= self.content <= 1.7E308:
-                    raise EncodingValueError("Content %s exceeds limits of -1.7E308 to 1.7E308 for a double" % str(self.content))
-            except TypeError:
-                raise EncodingValueError("Content %s cannot be compared for range -1.7E308 to 1.7E308" % str(self.content))
-            try:
-                result += struct.pack("<d", self.content)
-            except OverflowError as e:
-                raise EncodingValueError("Content %s cannot be encoded: %s" % str(e))
-        elif self.contenttype == ContentType.STRING:
-            try:
-                result += self.content.encode("latin1")
-            except UnicodeEncodeError:
-                raise EncodingValueError("Content %s cannot be encoded: %s" % str(e))
-        elif self.contenttype == ContentType.FILE or self.contenttype == ContentType.RAW:
-            if not isinstance(self.content, bytes):
-                raise EncodingValueError("Content is not in bytes format")
-            result += self.content
-        else:
-            raise MissingContentTypeError("Content of type %s is unknown in the encoder. Programming bug?" % (self.contenttype))
+        if self._encode_impl is None:
+            if self._contenttype is None:
+                raise MissingContentTypeError("No contenttype has been given to encode to")
+            raise MissingContentTypeError("Content of type %s is unknown in the encoder. Programming bug?" % (self._contenttype))
+        try:
+            return self._encode_impl(self.content)
+        except (struct.error, OverflowError) as e:
+            raise EncodingValueError("Content %s cannot be encoded as %s: %s" % (str(self.content), self._contenttype.name, str(e)))
 
-        return result
-
-    def encode(self):
-        result = b''
+    def encode(self, out=None):
+        if out is None:
+            result = bytearray()
+        else:
+            result = out
 
         if self.children or (not self.children and self.content is None) or self.nodeasbool:
-            result = (0).to_bytes(4, byteorder='little') # Node start
+            result += _NODE_START # Node start
 
         if self.content is not None:
             bytecontent = self._encodecontent()
             bytecontentlength = 2 + len(bytecontent) # add 2 for the content id
             result += bytecontentlength.to_bytes(4, byteorder='little')
-        if self.id is not None:
-            result += self.id.to_bytes(2, byteorder='little')
+        if self._id is not None:
+            if self._id_bytes is None:
+                try:
+                    self._id_bytes = _PACK_H(self._id)
+                except struct.error as e:
+                    raise EncodingValueError("Node id %s cannot be encoded: %s" % (str(self._id), str(e)))
+            result += self._id_bytes
         if self.content is not None:
             result += bytecontent
 
         if self.children or (not self.children and self.content is None) or self.nodeasbool:
             for child in self.children:
-                result += child.encode()
-            result += (0xffffffff).to_bytes(4, byteorder='little') # Node end
-        
+                child.encode(result)
+            result += _NODE_END # Node end
+
+        if out is None:
+            return bytes(result)
         return result
 
 
-class DecoderState(Enum):
-    RESET = 0
-    CONTRENTLENGTH = 1
-    NODEID = 2
-    NODEIDFORCONTENT = 3
-    CONTENT = 4
+class NodeTree:
+    """Decoded node tree stored as parallel columns
+
+    Nodes are kept in stream order with the root node at index 0. For each
+    node the id, the raw content, the index of the parent node (-1 for the
+    root node) and the depth (1 for the root node) are stored. Nodes which
+    just group subnodes have None as content. Subnodes are linked through
+    first_child and next_sibling, -1 marks the end of a chain.
+
+    Decoded trees leave asbool as None, as the stream has no flag for it an
+    empty node without subnodes acts as True value. Trees built from
+    BasicNodes keep their nodeasbool flags in asbool instead.
+    """
+
+    __slots__ = ('ids', 'contents', 'parents', 'depth', 'first_child', 'next_sibling', 'asbool')
+
+    def __init__(self) -> None:
+        self.ids = array('H')
+        self.contents = []
+        self.parents = array('i')
+        self.depth = array('H')
+        self.first_child = array('i')
+        self.next_sibling = array('i')
+        self.asbool = None
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __repr__(self):
+        return "<%s root_id=%s nodes=%s>" % (self.__class__.__name__, self.ids[0] if self.ids else None, len(self.ids))
+
+    @classmethod
+    def from_node(cls, root_node):
+        """Build a NodeTree from a BasicNode tree"""
+
+        tree = cls()
+        tree.asbool = array('b')
+        pending = [(root_node, -1)]
+        while pending:
+            node, parent = pending.pop()
+            index = tree._add(node.id, node.content, parent)
+            tree.asbool.append(bool(node.nodeasbool))
+            pending.extend((child, index) for child in reversed(node.children))
+        return tree
+
+    def _add(self, id, content, parent):
+        # nodes have to be added in stream order
+        index = len(self.ids)
+        self.ids.append(id)
+        self.contents.append(content)
+        self.parents.append(parent)
+        self.first_child.append(-1)
+        self.next_sibling.append(-1)
+        if parent < 0:
+            self.depth.append(1)
+            return index
+        self.depth.append(self.depth[parent] + 1)
+        previous = index - 1
+        if previous == parent:
+            self.first_child[parent] = index
+        else:
+            while self.parents[previous] != parent:
+                previous = self.parents[previous]
+            self.next_sibling[previous] = index
+        return index
+
+    def children_of(self, index):
+        """Iterate over the indices of the direct subnodes of the node at given index"""
+
+        next_sibling = self.next_sibling
+        child = self.first_child[index]
+        while child >= 0:
+            yield child
+            child = next_sibling[child]
+
+    def nodeasbool(self, index):
+        """Whether the node at given index is an empty node acting as True value"""
+
+        if self.asbool is not None:
+            return bool(self.asbool[index])
+        return self.contents[index] is None and self.first_child[index] < 0
+
+    def to_node(self, index=0):
+        """Build a BasicNode tree from the node at given index and its subnodes"""
+
+        ids = self.ids
+        contents = self.contents
+        parents = self.parents
+        depth = self.depth
+
+        end = index + 1
+        while end < len(ids) and depth[end] > depth[index]:
+            end += 1
+
+        nodes = []
+        for i in range(index, end):
+            content = contents[i]
+            node = BasicNode(id=ids[i], content=content, contenttype=None if content is None else ContentType.RAW)
+            if i != index:
+                node.parent_node = nodes[parents[i] - index]
+                node.parent_node.children.append(node)
+            nodes.append(node)
+        for i, node in enumerate(nodes, index):
+            node.nodeasbool = self.nodeasbool(i)
+
+        return nodes[0]
+
+
+_SCAN_DONE = 0
+_SCAN_INCOMPLETE = 1
+_SCAN_BAD_START = 2
+_SCAN_BAD_LENGTH = 3
+
+
+def _scan(buf, pos, current, last, level, ids, parents, depth, first_child, next_sibling, content_offsets, content_lengths):
+    """Scan the structure of the message in buf into the given columns, from pos on
+
+    Only integers are handled here: for every node the id, parent, depth and
+    sibling links are appended, content is recorded as offset and length in
+    buf (offset -1 for nodes that just group subnodes). With empty columns the
+    root node starts at pos, otherwise scanning continues there with the loop
+    state current, last and level returned by an earlier call. Nodes are only
+    appended once they are complete in buf.
+
+    Returns a tuple of status, position, needed buffer length and loop state.
+    For _SCAN_DONE the position points right after the message, for
+    _SCAN_INCOMPLETE it is where scanning continues once buf holds the needed
+    length and for the error states it points at the offending field.
+    """
+
+    end = len(buf)
+    add_id = ids.append
+    add_parent = parents.append
+    add_depth = depth.append
+    add_first_child = first_child.append
+    add_next_sibling = next_sibling.append
+    add_offset = content_offsets.append
+    add_length = content_lengths.append
+
+    if not ids:
+        if pos + 4 > end:
+            return _SCAN_INCOMPLETE, pos, pos + 4, current, last, level
+        if _U32_FROM(buf, pos)[0] != 0:
+            return _SCAN_BAD_START, pos, pos, current, last, level
+        if pos + 6 > end:
+            return _SCAN_INCOMPLETE, pos, pos + 6, current, last, level
+        add_id(_U16_FROM(buf, pos + 4)[0])
+        pos += 6
+        add_parent(-1)
+        add_depth(1)
+        add_first_child(-1)
+        add_next_sibling(-1)
+        add_offset(-1)
+        add_length(0)
+        current = 0
+        last = -1 # last subnode added to current node
+        level = 1
+    count = len(ids)
+    while current >= 0:
+        if pos + 4 > end:
+            return _SCAN_INCOMPLETE, pos, pos + 4, current, last, level
+        length = _U32_FROM(buf, pos)[0]
+        if length == 0xffffffff:
+            # marks end of nodetree
+            pos += 4
+            last = current
+            current = parents[current]
+            level -= 1
+            continue
+        if length == 1:
+            # too short to contain a node id
+            return _SCAN_BAD_LENGTH, pos, pos, current, last, level
+        # id and content, if any, have to be there before the node is added
+        needed = pos + 4 + (length if length else 2)
+        if needed > end:
+            return _SCAN_INCOMPLETE, pos, needed, current, last, level
+        add_id(_U16_FROM(buf, pos + 4)[0])
+        pos += 6
+        add_parent(current)
+        add_depth(level + 1)
+        add_first_child(-1)
+        add_next_sibling(-1)
+        index = count
+        count += 1
+        if last < 0:
+            first_child[current] = index
+        else:
+            next_sibling[last] = index
+        if length == 0:
+            # just subnodes, possibly with children themselves
+            add_offset(-1)
+            add_length(0)
+            current = index
+            last = -1
+            level += 1
+            continue
+        # real content follows after id
+        last = index
+        length -= 2
+        add_offset(pos)
+        add_length(length)
+        pos += length
+
+    return _SCAN_DONE, pos, pos, current, last, level
+
+
+class _PartialScan:
+    """Columns and loop state of a message which is scanned in several steps
+
+    When the buffer ends within a message, the nodes scanned so far are kept
+    here and scanning continues with the next field once more data arrived.
+    """
+
+    __slots__ = ('tree', 'content_offsets', 'content_lengths', 'pos', 'current', 'last', 'level')
+
+    def __init__(self, pos):
+        self.tree = NodeTree()
+        self.content_offsets = array('q')
+        self.content_lengths = array('q')
+        self.pos = pos
+        self.current = -1 # root node not scanned yet
+        self.last = -1
+        self.level = 0
+
+    def shift(self, offset):
+        """Move all positions after offset bytes were removed from the buffer start"""
+        self.pos -= offset
+        content_offsets = self.content_offsets
+        for i, content_offset in enumerate(content_offsets):
+            if content_offset >= 0:
+                content_offsets[i] = content_offset - offset
+
+
+def _scan_tree(buf, partial):
+    """Continue decoding the message of partial from buf into a NodeTree
+
+    Returns the tree and the position right after the message. When buf ends
+    before the message is complete, None and the buffer length needed to
+    continue are returned instead.
+    """
+
+    tree = partial.tree
+    status, partial.pos, needed, partial.current, partial.last, partial.level = _scan(
+        buf, partial.pos, partial.current, partial.last, partial.level,
+        tree.ids, tree.parents, tree.depth, tree.first_child, tree.next_sibling,
+        partial.content_offsets, partial.content_lengths)
+    position = partial.pos
+    if status == _SCAN_INCOMPLETE:
+        return None, needed
+    if status == _SCAN_BAD_START:
+        raise DecodeValueError("Expected 4 empty bytes for root node start but got %s" % bytes(buf[position:position + 4]))
+    if status == _SCAN_BAD_LENGTH:
+        raise DecodeValueError("Content length %s is too short to contain a node id" % _U32_FROM(buf, position)[0])
+    tree.contents = [None if offset < 0 else buf[offset:offset + length].tobytes() for offset, length in zip(partial.content_offsets, partial.content_lengths)]
+    return tree, position
 
 
 class StreamDecoder:
     def __init__(self) -> None:
         self.log = logging.getLogger("pyzusi3.nodes.StreamDecoder")
-        self.logstream = logging.getLogger("pyzusi3.nodes.StreamDecoder.streamdata")
+        self.buf = None
+        self.pos = 0
 
     def reset(self):
         self.log.info("Resetting state")
-        self.state = DecoderState.RESET
-        self.root_node = None
-        self.current_node = None
-        self.content_length = None
-        self.level = 1
+        self.tree = None
 
     def decode(self, bytecontent):
+        for tree in self.decode_tree(bytecontent):
+            yield tree.to_node()
+
+    def decode_tree(self, bytecontent):
         if not isinstance(bytecontent, bytes):
             raise ValueError("Need bytes to decode, not %s" % type(bytecontent))
-        self.bytecontent = iter(bytecontent)
+        self.buf = memoryview(bytecontent)
+        self.pos = 0
         self.log.info("Start decoding")
         while True:
             self.reset()
-            self._decode_loop()
-            self.log.debug("Decoding result:")
-            self.log.debug(repr(self.root_node))
-            if self.root_node is None:
+            self._decode()
+            self.log.debug("Decoding result: %r", self.tree)
+            if self.tree is None:
                 break
-            yield self.root_node
-
-    def _next_content_length(self):
-        if self.state == DecoderState.RESET:
-            length = 4
-        elif self.state == DecoderState.NODEID or self.state == DecoderState.NODEIDFORCONTENT:
-            length = 2
-        elif self.state == DecoderState.CONTRENTLENGTH:
-            length = 4
-        elif self.state == DecoderState.CONTENT:
-            length = self.content_length
-        else:
-            raise NotImplementedError("State %s not implemented in length check" % self.state)
-
-        return length
-
-    def _get_bytes(self):
-        data = []
-        for i in range(self._next_content_length()):
-            try:
-                data.append(next(self.bytecontent))
-            except StopIteration:
-                raise MissingBytesDecodeError("Not enough bytes to get from datastream")
-        return bytes(data)
-
-    def _decode_loop(self):
-        while self.level > 0:
-            try:
-                incoming_bytes = self._get_bytes()
-            except MissingBytesDecodeError as e:
-                if self.level == 1:
-                    break
-                else:
-                    raise MissingBytesDecodeError(str(e))
-            self._decode_single_pass(incoming_bytes)
-            if self.state == DecoderState.CONTRENTLENGTH and self.level == 1:
-                # finished decoding
-                break
-        if self.current_node != self.root_node and self.current_node != None:
-            raise DecodeValueError("Not all nodes have been closed, data incomplete")
-
-    def _decode_single_pass(self, incoming_bytes):
-        self.log.debug("Current state: %s" % self.state)
-        if self.state == DecoderState.RESET:
-            if incoming_bytes != (0).to_bytes(4, byteorder='little'):
-                raise DecodeValueError("Expected 4 empty bytes for root node start but got %s" % incoming_bytes)
-            self.root_node = self.current_node = BasicNode()
-            self.log.debug("Created new node")
-            self.state = DecoderState.NODEID
-            self.level += 1
-            self.log.debug("New level: %s" % self.level)
-
-        elif self.state == DecoderState.NODEID or self.state == DecoderState.NODEIDFORCONTENT:
-            self.current_node.id = struct.unpack("<H", incoming_bytes)[0]
-            self.log.debug("Set node id to %s" % self.current_node.id)
-            if self.state == DecoderState.NODEIDFORCONTENT:
-                self.state = DecoderState.CONTENT
-            else:
-                self.state = DecoderState.CONTRENTLENGTH
-        elif self.state == DecoderState.CONTRENTLENGTH:
-            if incoming_bytes == (0xffffffff).to_bytes(4, byteorder='little'):
-                # marks end of nodetree
-                self.log.debug("Finished current node")
-                if not self.current_node.children and self.current_node.content is None:
-                    self.current_node.nodeasbool = True
-                self.current_node = self.current_node.parent_node
-                self.state = DecoderState.CONTRENTLENGTH
-                self.level -= 1
-                self.log.debug("New level: %s" % self.level)
-                return
-            self.log.debug("Creating new child node")
-            new_node = BasicNode(parent_node=self.current_node)
-            self.current_node.children.append(new_node)
-            self.current_node = new_node
-            content_length = struct.unpack("<I", incoming_bytes)[0]
-            if content_length == 0:
-                # just subnodes, possibly with children themselves
-                self.state = DecoderState.NODEID
-                self.log.debug("No content, just setting id afterwards")
-                self.level += 1
-                self.log.debug("New level: %s" % self.level)
-            else:
-                # real content follows after id
-                self.content_length = struct.unpack("<I", incoming_bytes)[0] - 2
-                self.log.debug("Setting id and adding content with length %s to node" % self.content_length)
-                self.state = DecoderState.NODEIDFORCONTENT
-        elif self.state == DecoderState.CONTENT:
-            self.current_node.content = incoming_bytes
-            self.current_node.contenttype = ContentType.RAW
-            self.log.debug("Got content %s" % self.current_node.content)
-            self.current_node = self.current_node.parent_node
-            self.state = DecoderState.CONTRENTLENGTH
+            yield self.tree
 
-class AsyncStreamDecoder(StreamDecoder):
+    def _decode(self):
+        if self.pos + 4 > len(self.buf):
+            # no further message in datastream
+            return
+        tree, pos = _scan_tree(self.buf, _PartialScan(self.pos))
+        if tree is None:
+            raise MissingBytesDecodeError("Not enough bytes to get from datastream")
+        self.pos = pos
+        self.tree = tree
 
-    async def _get_bytes(self):
-        length = self._next_content_length()
-        self.logstream.debug("Next content length: %s" % length)
-        data = b''
-        while len(data) != length:
-            new_data = b''
-            while True:
-                new_data = await self.bytecontent.readexactly(length)
-                break
-            if new_data == b'':
-                # eof
-                break
-            data += new_data
-        self.logstream.debug("Got data: %s" % data)
-        return data
+
+class AsyncStreamDecoder(StreamDecoder):
+    READ_SIZE = 65536
 
     async def decode(self, stream):
+        async for tree in self.decode_tree(stream):
+            yield tree.to_node()
+
+    async def decode_tree(self, stream):
         if not isinstance(stream, asyncio.StreamReader):
             raise ValueError("Need stream to decode, not %s" % type(stream))
-        self.bytecontent = stream
+        self.buf = bytearray()
+        self.pos = 0
         self.log.info("Start decoding")
         while True:
             self.reset()
-            try:
-                await self._decode_loop()
-            except asyncio.exceptions.IncompleteReadError as e:
-                if self.level == 1:
-                    break
-                else:
-                    raise asyncio.exceptions.IncompleteReadError(str(e))                
-            self.log.debug("Decoding result:")
-            self.log.debug(repr(self.root_node))
-            if self.root_node is None:
-                break
-            yield self.root_node
-
-    async def _decode_loop(self):
-        while self.level > 0:
-            incoming_bytes = await self._get_bytes()
-            self.log.debug("Next decode pass")
-            self._decode_single_pass(incoming_bytes)
-            if self.state == DecoderState.CONTRENTLENGTH and self.level == 1:
-                # finished decoding
+            await self._decode(stream)
+            self.log.debug("Decoding result: %r", self.tree)
+            if self.tree is None:
                 break
-        if self.current_node != self.root_node and self.current_node != None:
-            raise DecodeValueError("Not all nodes have been closed, data incomplete")
+            yield self.tree
+
+    async def _decode(self, stream):
+        # the message is scanned as far as data is there, after further reads
+        # scanning continues with the field it stopped at
+        partial = _PartialScan(self.pos)
+        needed = self.pos + 4
+        while True:
+            if len(self.buf) >= needed:
+                with memoryview(self.buf) as view:
+                    tree, pos = _scan_tree(view, partial)
+                if tree is not None:
+                    self.pos = pos
+                    self.tree = tree
+                    return
+                # message not complete yet, wait for more data
+                needed = pos
+
+            # read all data available at once, there might be several messages waiting
+            data = await stream.read(self.READ_SIZE)
+            if not data:
+                remaining = bytes(self.buf[self.pos:])
+                # less than 4 bytes cannot even hold the root start marker, so no
+                # message has been started. Like StreamDecoder this is treated as
+                # regular end of stream, only a started message is reported as cut off.
+                if len(remaining) >= 4:
+                    raise asyncio.exceptions.IncompleteReadError(remaining, None)
+                # no further message in datastream
+                return
+            if self.pos:
+                # drop the messages before, this happens once per message at most
+                partial.shift(self.pos)
+                needed -= self.pos
+                del self.buf[:self.pos]
+                self.pos = 0
+            self.buf += data
@@ -81,6 +81,47 @@ class TestMessageDecoderSimple(unittest.TestCase):
         )
         self.assertEqual(basemessage, expected_message)
 
+    def testDecodeTreeNeededData(self):
+        msg = messages.NEEDED_DATA(
+            anzeigen=[messages.FAHRPULT_ANZEIGEN.GESCHWINDIGKEIT_ABSOLUT, messages.FAHRPULT_ANZEIGEN.STATUS_SIFA],
+            bedienung=True
+        )
+        encoded_bytes = encode_obj(msg).encode()
+
+        decoder = StreamDecoder()
+        trees = [tree for tree in decoder.decode_tree(encoded_bytes)]
+        self.assertEqual(len(trees), 1)
+
+        messagedecoder = MessageDecoder()
+        basemessage, submessages = messagedecoder.parse_tree(trees[0])
+        self.assertEqual(submessages, [])
+        self.assertEqual(basemessage, msg)
+
+        messagedecoder = MessageDecoder()
+        message_class, message_pid = messagedecoder.find_messageclass(list(decoder.decode(encoded_bytes))[0])
+        self.assertIs(message_class, messages.NEEDED_DATA)
+
+    def testParseNodeasboolFromBasicNode(self):
+        msg = messages.NEEDED_DATA(
+            anzeigen=[messages.FAHRPULT_ANZEIGEN.GESCHWINDIGKEIT_ABSOLUT],
+            bedienung=True
+        )
+        decoder = StreamDecoder()
+        root_node = list(decoder.decode(encode_obj(msg).encode()))[0]
+
+        messagedecoder = MessageDecoder()
+        basemessage, submessages = messagedecoder.parse(root_node)
+        self.assertEqual(basemessage, msg)
+
+        pending = [root_node]
+        while pending:
+            node = pending.pop()
+            node.nodeasbool = False
+            pending.extend(node.children)
+        messagedecoder = MessageDecoder()
+        basemessage, submessages = messagedecoder.parse(root_node)
+        self.assertEqual(basemessage, msg._replace(bedienung=None))
+
 
 class TestMessageEncoderSimple(unittest.TestCase):
     def test_encodeObj(self):
@@ -1,6 +1,10 @@
+import asyncio
 import unittest
+from unittest import mock
 
-from pyzusi3.nodes import BasicNode, ContentType, StreamDecoder
+from pyzusi3.exceptions import DecodeValueError, EncodingValueError, MissingBytesDecodeError
+from pyzusi3 import nodes
+from pyzusi3.nodes import AsyncStreamDecoder, BasicNode, ContentType, NodeTree, StreamDecoder
 
 class TestManualExample1(unittest.TestCase):
     def setUp(self):
@@ -41,6 +45,38 @@ class TestManualExample1(unittest.TestCase):
             result += decoded_tree.encode()
         self.assertEqual(self.bytes_written, result)
 
+    def test_tree_decoding(self):
+        decoder = StreamDecoder()
+        trees = list(decoder.decode_tree(self.bytes_written))
+        self.assertEqual(len(trees), 1)
+        tree = trees[0]
+        self.assertEqual(list(tree.ids), [1, 1, 1, 2, 3, 4])
+        self.assertEqual(list(tree.parents), [-1, 0, 1, 1, 1, 1])
+        self.assertEqual(list(tree.depth), [1, 2, 3, 3, 3, 3])
+        self.assertEqual(tree.contents, [None, None, b'\x02\x00', b'\x02\x00', b'Fahrpult', b'2.0'])
+        self.assertEqual(tree.to_node(1).encode(), self.bytes_written[6:-4])
+        self.assertEqual(list(tree.children_of(0)), [1])
+        self.assertEqual(list(tree.children_of(1)), [2, 3, 4, 5])
+        self.assertEqual(list(tree.children_of(2)), [])
+
+    def test_deep_equal(self):
+        decoder = StreamDecoder()
+        decoded_tree = list(decoder.decode(self.bytes_written))[0]
+        other_tree = list(decoder.decode(self.bytes_written))[0]
+        self.assertTrue(decoded_tree.deep_equal(other_tree))
+        self.assertNotEqual(decoded_tree, other_tree)
+        self.assertFalse(decoded_tree.deep_equal(self.command))
+        other_tree.children[0].children[3].content = b'2.1'
+        self.assertFalse(decoded_tree.deep_equal(other_tree))
+        self.assertEqual(len({decoded_tree, other_tree}), 2)
+
+    def test_tree_from_node(self):
+        tree = NodeTree.from_node(self.command)
+        self.assertEqual(list(tree.ids), [1, 1, 1, 2, 3, 4])
+        self.assertEqual(list(tree.parents), [-1, 0, 1, 1, 1, 1])
+        self.assertEqual(list(tree.first_child), [1, 2, -1, -1, -1, -1])
+        self.assertEqual(list(tree.next_sibling), [-1, -1, 3, 4, 5, -1])
+
 class TestManualExample2(unittest.TestCase):
     def setUp(self):
         self.bytes_written = b'' + \
@@ -177,3 +213,191 @@ class TestRealWorldStreamdata(unittest.TestCase):
         for decoded_tree in decoder.decode(bytes_written):
             result += decoded_tree.encode()
         self.assertEqual(bytes_written, result)
+
+
+class TestContentEncoding(unittest.TestCase):
+    def test_integer_limits(self):
+        limits = (
+            (ContentType.BYTE, 0, 255),
+            (ContentType.SHORTINT, -128, 127),
+            (ContentType.WORD, 0, 65535),
+            (ContentType.SMALLINT, -32768, 32767),
+            (ContentType.INTEGER, -2147483648, 2147483647),
+            (ContentType.CARDINAL, 0, 4294967295),
+            (ContentType.INTEGER64BIT, -9223372036854775808, 9223372036854775807),
+        )
+        for contenttype, low, high in limits:
+            with self.subTest(contenttype=contenttype):
+                low_bytes = BasicNode(id=1, content=low, contenttype=contenttype).encode()
+                high_bytes = BasicNode(id=1, content=high, contenttype=contenttype).encode()
+                self.assertEqual(len(low_bytes), len(high_bytes))
+                with self.assertRaises(EncodingValueError):
+                    BasicNode(id=1, content=low - 1, contenttype=contenttype).encode()
+                with self.assertRaises(EncodingValueError):
+                    BasicNode(id=1, content=high + 1, contenttype=contenttype).encode()
+                with self.assertRaises(EncodingValueError):
+                    BasicNode(id=1, content="1", contenttype=contenttype).encode()
+
+    def test_negative_integer(self):
+        node = BasicNode(id=1, content=-2, contenttype=ContentType.SMALLINT)
+        self.assertEqual(node.encode(), b'\x04\x00\x00\x00\x01\x00\xfe\xff')
+
+    def test_string(self):
+        node = BasicNode(id=1, content="Gr\u00fc\u00df", contenttype=ContentType.STRING)
+        self.assertEqual(node.encode(), b'\x06\x00\x00\x00\x01\x00Gr\xfc\xdf')
+        with self.assertRaises(EncodingValueError):
+            BasicNode(id=1, content="\u20ac", contenttype=ContentType.STRING).encode()
+        with self.assertRaises(EncodingValueError):
+            BasicNode(id=1, content=1, contenttype=ContentType.STRING).encode()
+
+    def test_invalid_id(self):
+        node = BasicNode(id="a")
+        with self.assertRaises(EncodingValueError):
+            node.encode()
+        node.id = 65536
+        with self.assertRaises(EncodingValueError):
+            node.encode()
+        node.id = 2
+        self.assertEqual(node.encode(), b'\x00\x00\x00\x00\x02\x00\xff\xff\xff\xff')
+
+    def test_float_limits(self):
+        with self.assertRaises(EncodingValueError):
+            BasicNode(id=1, content=3.5E38, contenttype=ContentType.SINGLE).encode()
+        with self.assertRaises(EncodingValueError):
+            BasicNode(id=1, content="1.0", contenttype=ContentType.DOUBLE).encode()
+
+
+class TestStreamDecoderErrors(unittest.TestCase):
+    def test_incomplete_message(self):
+        bytes_written = b'\x00\x00\x00\x00' + \
+            b'\x01\x00' + \
+            b'\x04\x00\x00\x00' + \
+            b'\x01\x00' + \
+            b'\x02'
+        decoder = StreamDecoder()
+        with self.assertRaises(MissingBytesDecodeError):
+            list(decoder.decode(bytes_written))
+
+    def test_missing_node_end(self):
+        bytes_written = b'\x00\x00\x00\x00' + \
+            b'\x01\x00' + \
+            b'\x04\x00\x00\x00' + \
+            b'\x01\x00' + \
+            b'\x02\x00'
+        decoder = StreamDecoder()
+        with self.assertRaises(MissingBytesDecodeError):
+            list(decoder.decode(bytes_written))
+
+    def test_invalid_content_length(self):
+        decoder = StreamDecoder()
+        with self.assertRaises(DecodeValueError):
+            list(decoder.decode(b'\x00\x00\x00\x00\x01\x00\x01\x00\x00\x00\x01\x00\xff\xff\xff\xff'))
+
+    def test_invalid_root_start(self):
+        decoder = StreamDecoder()
+        with self.assertRaises(DecodeValueError):
+            list(decoder.decode(b'\x01\x00\x00\x00\x01\x00'))
+
+
+class TestAsyncStreamDecoder(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.bytes_written = b'\x00\x00\x00\x00' + \
+            b'\x02\x00' + \
+            b'\x00\x00\x00\x00' + \
+            b'\n\x00' + \
+            b'\xff\xff\xff\xff' + \
+            b'\xff\xff\xff\xff' + \
+            b'\x00\x00\x00\x00' + \
+            b'\x02\x00' + \
+            b'\x00\x00\x00\x00' + \
+            b'\n\x00' + \
+            b'\x06\x00\x00\x00' + \
+            b'\xa9\x00' + \
+            b'\x00\x00\x00\x00' + \
+            b'\xff\xff\xff\xff' + \
+            b'\xff\xff\xff\xff'
+
+    async def test_stream_decoding(self):
+        reader = asyncio.StreamReader()
+        reader.feed_data(self.bytes_written)
+        reader.feed_eof()
+
+        decoder = AsyncStreamDecoder()
+        result = b''
+        async for decoded_tree in decoder.decode(reader):
+            result += decoded_tree.encode()
+        self.assertEqual(self.bytes_written, result)
+
+    async def test_stream_decoding_in_chunks(self):
+        reader = asyncio.StreamReader()
+
+        async def feed():
+            for i in range(0, len(self.bytes_written), 3):
+                reader.feed_data(self.bytes_written[i:i + 3])
+                await asyncio.sleep(0)
+            reader.feed_eof()
+
+        feeder = asyncio.create_task(feed())
+        decoder = AsyncStreamDecoder()
+        result = b''
+        async for decoded_tree in decoder.decode(reader):
+            result += decoded_tree.encode()
+        await feeder
+        self.assertEqual(self.bytes_written, result)
+
+    async def test_large_content_scanned_once_complete(self):
+        bytes_written = b'\x00\x00\x00\x00' + \
+            b'\x01\x00' + \
+            b'\xea\x03\x00\x00' + \
+            b'\x01\x00' + \
+            b'\xab' * 1000 + \
+            b'\xff\xff\xff\xff'
+        reader = asyncio.StreamReader()
+
+        async def feed():
+            for i in range(0, len(bytes_written), 10):
+                reader.feed_data(bytes_written[i:i + 10])
+                await asyncio.sleep(0)
+            reader.feed_eof()
+
+        feeder = asyncio.create_task(feed())
+        decoder = AsyncStreamDecoder()
+        with mock.patch.object(nodes, '_scan_tree', wraps=nodes._scan_tree) as scan_tree:
+            trees = [tree async for tree in decoder.decode_tree(reader)]
+        await feeder
+        self.assertEqual(len(trees), 1)
+        self.assertEqual(trees[0].contents[1], b'\xab' * 1000)
+        self.assertLessEqual(scan_tree.call_count, 3)
+
+    async def test_many_nodes_scan_resumed(self):
+        root = BasicNode(id=1, children=[BasicNode(id=2, content=i, contenttype=ContentType.CARDINAL) for i in range(3000)])
+        bytes_written = self.bytes_written + root.encode()
+        reader = asyncio.StreamReader()
+
+        async def feed():
+            for i in range(0, len(bytes_written), 10):
+                reader.feed_data(bytes_written[i:i + 10])
+                await asyncio.sleep(0)
+            reader.feed_eof()
+
+        feeder = asyncio.create_task(feed())
+        decoder = AsyncStreamDecoder()
+        with mock.patch.object(nodes, '_scan', wraps=nodes._scan) as scan, \
+                mock.patch.object(nodes, '_U32_FROM', wraps=nodes._U32_FROM) as read_length:
+            trees = [tree async for tree in decoder.decode_tree(reader)]
+        await feeder
+        self.assertEqual(len(trees), 3)
+        self.assertEqual(trees[2].contents[1:], [i.to_bytes(4, 'little') for i in range(3000)])
+        # 9 length fields in the first two messages and 3002 in the last one, each
+        # is read once plus at most once more by every scan that stopped at it
+        self.assertLessEqual(read_length.call_count, 9 + 3002 + scan.call_count)
+
+    async def test_incomplete_message(self):
+        reader = asyncio.StreamReader()
+        reader.feed_data(self.bytes_written[:-4])
+        reader.feed_eof()
+
+        decoder = AsyncStreamDecoder()
+        with self.assertRaises(asyncio.exceptions.IncompleteReadError):
+            async for decoded_tree in decoder.decode(reader):
+                pass